@@ -0,0 +1,226 @@
+# load_test.py
+"""
+Local load test for the mentions API.
+
+Drives the Django views in-process against fake Reddit (PRAW) and Gemini stand-ins with
+configurable latency, and reports throughput, latency percentiles and status codes.
+No network access or API keys are needed.
+
+All requests run from a thread pool in this one process, so the results describe a single threaded
+worker (gunicorn gthread or runserver). The admission limits are per process and have no effect under
+sync workers, which serve one request per process at a time.
+
+Examples:
+    python load_test.py --requests 200 --concurrency 20
+    python load_test.py --endpoint qna --clients 2 --max-per-client 2 --max-concurrent 4 --max-queue 4
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+
+# --- Fake Reddit (PRAW) Stand-in ---
+class FakeComment:
+    def __init__(self, submission, body):
+        self.id = uuid.uuid4().hex[:7]
+        self.body = body
+        self.permalink = f"{submission.permalink}{self.id}/"
+        self.subreddit = submission.subreddit
+        self.score = random.randint(-5, 200)
+        self.created_utc = time.time() - random.randint(0, 5 * 86400)
+        self.author = SimpleNamespace(name=f"user_{random.randint(1, 50)}")
+
+
+class FakeCommentForest:
+    def __init__(self, comments, latency):
+        self._comments = comments
+        self._latency = latency
+
+    def replace_more(self, limit=None):
+        time.sleep(self._latency)
+
+    def list(self):
+        return self._comments
+
+
+class FakeSubmission:
+    def __init__(self, term, comments_per_submission, latency):
+        self.id = uuid.uuid4().hex[:7]
+        self.title = f"What do you think about {term}? Thread #{random.randint(1, 10000)}"
+        self.selftext = random.choice([
+            "",
+            f"I have been using {term} for a month and it is great so far.",
+            f"Honestly {term} has been a disappointment, support never answered my ticket.",
+        ])
+        self.permalink = f"/r/fake/comments/{self.id}/thread/"
+        self.subreddit = SimpleNamespace(display_name=random.choice(["technology", "news", "AskReddit", "fake"]))
+        self.score = random.randint(0, 5000)
+        self.created_utc = time.time() - random.randint(0, 5 * 86400)
+        self.author = SimpleNamespace(name=f"user_{random.randint(1, 50)}")
+        bodies = [
+            f"{term} is awesome, would recommend.",
+            f"I had a terrible experience with {term} last week.",
+            f"Has anyone compared {term} with the alternatives?",
+            f"Copy-pasted bot reply: check out the {term} megathread for more info!",
+        ]
+        self.comments = FakeCommentForest(
+            [FakeComment(self, random.choice(bodies)) for _ in range(comments_per_submission)], latency
+        )
+
+
+class FakeSubreddit:
+    def __init__(self, options):
+        self._options = options
+
+    def search(self, query, sort=None, time_filter=None, limit=25):
+        time.sleep(self._options.reddit_latency)
+        return [
+            FakeSubmission(query, self._options.comments_per_submission, self._options.reddit_latency)
+            for _ in range(min(limit, self._options.submissions))
+        ]
+
+
+def make_fake_reddit(options):
+    class FakeReddit:
+        def __init__(self, **kwargs):
+            self.read_only = False
+
+        def subreddit(self, name):
+            return FakeSubreddit(options)
+    return FakeReddit
+
+
+# --- Fake Gemini Stand-in ---
+class FakeGeminiModel:
+    def __init__(self, model_name, latency):
+        self.model_name = model_name
+        self._latency = latency
+
+    def generate_content(self, prompt_text, generation_config=None, safety_settings=None):
+        time.sleep(self._latency)
+        if getattr(generation_config, "response_mime_type", None) == "application/json":
+            text = json.dumps({"summary": "Fake summary of the mentions.",
+                               "themes": ["Fake Theme: A fake explanation."]})
+        else:
+            text = "1. Fake Theme: A fake explanation."
+        part = SimpleNamespace(text=text)
+        candidate = SimpleNamespace(content=SimpleNamespace(parts=[part]))
+        return SimpleNamespace(candidates=[candidate], prompt_feedback=None)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load-test the mentions API views against fake Reddit/Gemini backends.")
+    parser.add_argument("--endpoint", choices=["mentions", "qna"], default="mentions")
+    parser.add_argument("--requests", type=int, default=100, help="Total number of requests to send.")
+    parser.add_argument("--concurrency", type=int, default=10, help="Number of concurrent request threads.")
+    parser.add_argument("--clients", type=int, default=10, help="Number of distinct client IPs to spread requests over.")
+    parser.add_argument("--reddit-latency", type=float, default=0.2, help="Seconds per fake Reddit call.")
+    parser.add_argument("--gemini-latency", type=float, default=0.5, help="Seconds per fake Gemini call.")
+    parser.add_argument("--submissions", type=int, default=10, help="Fake submissions returned per search.")
+    parser.add_argument("--comments-per-submission", type=int, default=10)
+    parser.add_argument("--max-concurrent", type=int, help="Overrides MENTIONS_MAX_CONCURRENT / QNA_MAX_CONCURRENT.")
+    parser.add_argument("--max-queue", type=int, help="Overrides MENTIONS_MAX_QUEUE / QNA_MAX_QUEUE.")
+    parser.add_argument("--max-per-client", type=int, help="Overrides ADMISSION_MAX_PER_CLIENT.")
+    return parser.parse_args()
+
+
+def main():
+    options = parse_args()
+
+    # Admission limits are read when the views module is imported, so set them first
+    prefix = "MENTIONS" if options.endpoint == "mentions" else "QNA"
+    if options.max_concurrent is not None:
+        os.environ[f"{prefix}_MAX_CONCURRENT"] = str(options.max_concurrent)
+    if options.max_queue is not None:
+        os.environ[f"{prefix}_MAX_QUEUE"] = str(options.max_queue)
+    if options.max_per_client is not None:
+        os.environ["ADMISSION_MAX_PER_CLIENT"] = str(options.max_per_client)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tracker.settings")
+    import django
+    django.setup()
+
+    from django.test import Client
+    from mentions_api import views
+
+    if not views.analyzer:
+        print("VADER lexicon is not available. Run `python download_nltk_data.py` first.")
+        sys.exit(1)
+
+    # Swap in the fake backends
+    views.praw.Reddit = make_fake_reddit(options)
+    views.ENABLE_GEMINI_ANALYSIS = True
+    views.gemini_summary_model = FakeGeminiModel("fake-summary-model", options.gemini_latency)
+    views.gemini_qna_model = FakeGeminiModel("fake-qna-model", options.gemini_latency)
+
+    admission = views.mentions_admission if options.endpoint == "mentions" else views.qna_admission
+    print(f"Load testing /api/reddit-{options.endpoint}/: {options.requests} requests, "
+          f"concurrency {options.concurrency}, {options.clients} clients "
+          f"(admission: max_concurrent={admission.max_concurrent}, max_queue={admission.max_queue}, "
+          f"max_per_client={admission.max_per_client})")
+
+    qna_payload = json.dumps({
+        "question": "What are common complaints?",
+        "search_term": "widget",
+        "context_mentions": [{"type": "comment", "title": "Comment in: widget thread", "text": "widget broke", "score": 3}] * 20,
+    })
+
+    latencies = []
+    status_counts = Counter()
+    results_lock = threading.Lock()
+
+    def send_request(i):
+        client = Client(REMOTE_ADDR=f"10.0.0.{i % options.clients + 1}")
+        start = time.perf_counter()
+        if options.endpoint == "mentions":
+            response = client.get("/api/reddit-mentions/", {"term": f"widget{i}"})
+        else:
+            response = client.post("/api/reddit-qna/", qna_payload, content_type="application/json")
+        elapsed = time.perf_counter() - start
+        with results_lock:
+            latencies.append(elapsed)
+            status_counts[response.status_code] += 1
+
+    # Silence the views' per-request logging (and Django's 503 log lines) while the load test runs
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        run_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options.concurrency) as executor:
+            list(executor.map(send_request, range(options.requests)))
+        total_time = time.perf_counter() - run_start
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    latencies.sort()
+    succeeded = status_counts.get(200, 0)
+    print(f"Total time:    {total_time:.2f}s")
+    print(f"Throughput:    {options.requests / total_time:.2f} req/s ({succeeded / total_time:.2f} successful req/s)")
+    print(f"Status codes:  {dict(sorted(status_counts.items()))}")
+    print(f"Latency mean:  {statistics.mean(latencies) * 1000:.0f} ms")
+    for pct in (50, 90, 95, 99):
+        print(f"Latency p{pct}:   {percentile(latencies, pct) * 1000:.0f} ms")
+    print(f"Latency max:   {latencies[-1] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
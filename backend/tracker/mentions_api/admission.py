@@ -0,0 +1,165 @@
+import functools
+import threading
+from collections import Counter, OrderedDict, deque
+
+from rest_framework.response import Response
+from rest_framework import status
+
+# --- Admission Control ---
+# Each request to a crawl/LLM endpoint holds a worker thread for its full duration, so every endpoint
+# gets a concurrency limit and a bounded waiting queue. Requests that cannot be queued get a 503 with
+# Retry-After instead of piling up. Queued requests are admitted round-robin across clients, and each
+# client may only hold a limited number of running + queued slots, so one client cannot starve others.
+# A client over its own cap gets a 429 instead, since the server itself is not overloaded.
+
+# Outcomes of AdmissionController.acquire
+ADMITTED = "admitted"
+REJECTED_CLIENT_LIMIT = "client_limit"
+REJECTED_QUEUE_FULL = "queue_full"
+REJECTED_QUEUE_TIMEOUT = "queue_timeout"
+
+
+class _Ticket:
+    """A queued request waiting to be admitted."""
+    __slots__ = ("granted",)
+
+    def __init__(self):
+        self.granted = False
+
+
+class AdmissionController:
+    """Bounds concurrent requests for one endpoint, with a fair bounded queue for the overflow."""
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_per_client: int,
+                 queue_timeout: float, retry_after: int, trusted_proxy_count: int = 0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_per_client = max_per_client
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.trusted_proxy_count = trusted_proxy_count
+
+        self._condition = threading.Condition()
+        self._active = 0
+        self._client_slots = Counter()  # Running + queued requests per client
+        self._waiting = OrderedDict()   # client_id -> deque of tickets; order is the round-robin order
+        self._waiting_count = 0
+
+    def acquire(self, client_id: str) -> str:
+        """
+        Admits a request, waiting in the queue if needed.
+        Returns ADMITTED, or the reason it was rejected (REJECTED_CLIENT_LIMIT, REJECTED_QUEUE_FULL
+        or REJECTED_QUEUE_TIMEOUT).
+        """
+        with self._condition:
+            if self.max_per_client and self._client_slots[client_id] >= self.max_per_client:
+                print(f"[{self.name}] Rejected request from {client_id}: per-client limit reached.")
+                return REJECTED_CLIENT_LIMIT
+
+            if self._active < self.max_concurrent and not self._waiting_count:
+                self._active += 1
+                self._client_slots[client_id] += 1
+                return ADMITTED
+
+            if self._waiting_count >= self.max_queue:
+                print(f"[{self.name}] Rejected request from {client_id}: queue is full ({self._waiting_count} waiting).")
+                return REJECTED_QUEUE_FULL
+
+            ticket = _Ticket()
+            self._waiting.setdefault(client_id, deque()).append(ticket)
+            self._waiting_count += 1
+            self._client_slots[client_id] += 1
+
+            self._condition.wait_for(lambda: ticket.granted, timeout=self.queue_timeout)
+            if ticket.granted:
+                return ADMITTED
+
+            # Timed out while queued; withdraw the ticket
+            client_queue = self._waiting[client_id]
+            client_queue.remove(ticket)
+            if not client_queue:
+                del self._waiting[client_id]
+            self._waiting_count -= 1
+            self._release_client_slot(client_id)
+            print(f"[{self.name}] Rejected request from {client_id}: timed out after {self.queue_timeout}s in queue.")
+            return REJECTED_QUEUE_TIMEOUT
+
+    def release(self, client_id: str):
+        """Frees the slot held by an admitted request and admits the next queued request(s)."""
+        with self._condition:
+            self._active -= 1
+            self._release_client_slot(client_id)
+            self._admit_waiting()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {"active": self._active, "waiting": self._waiting_count}
+
+    def _release_client_slot(self, client_id: str):
+        self._client_slots[client_id] -= 1
+        if self._client_slots[client_id] <= 0:
+            del self._client_slots[client_id]
+
+    def _admit_waiting(self):
+        # Must be called with the condition held. Serves clients round-robin.
+        admitted_any = False
+        while self._waiting and self._active < self.max_concurrent:
+            client_id, client_queue = next(iter(self._waiting.items()))
+            ticket = client_queue.popleft()
+            if client_queue:
+                self._waiting.move_to_end(client_id)
+            else:
+                del self._waiting[client_id]
+            self._waiting_count -= 1
+            self._active += 1
+            ticket.granted = True
+            admitted_any = True
+        if admitted_any:
+            self._condition.notify_all()
+
+
+def _strip_port(address: str) -> str:
+    """Removes a ':port' suffix from an IPv4 ('1.2.3.4:5678') or bracketed IPv6 ('[::1]:443') address."""
+    if address.startswith('['):
+        return address[1:].split(']', 1)[0]
+    if address.count(':') == 1:
+        return address.split(':', 1)[0]
+    return address
+
+
+def get_client_id(request, trusted_proxy_count: int = 0) -> str:
+    """
+    Identifies the client for fairness purposes.
+    Uses REMOTE_ADDR unless the app runs behind `trusted_proxy_count` reverse proxies, in which case the
+    address the outermost trusted proxy saw is the Nth X-Forwarded-For entry from the right. Entries further
+    left are supplied by the client and cannot be trusted.
+    """
+    if trusted_proxy_count > 0:
+        forwarded_for = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+        if len(forwarded_for) >= trusted_proxy_count:
+            return _strip_port(forwarded_for[-trusted_proxy_count])
+    return _strip_port(request.META.get('REMOTE_ADDR') or 'unknown')
+
+
+def admission_controlled(controller: AdmissionController):
+    """Decorator for APIView handler methods that runs them under the given admission controller."""
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            client_id = get_client_id(request, controller.trusted_proxy_count)
+            outcome = controller.acquire(client_id)
+            if outcome != ADMITTED:
+                if outcome == REJECTED_CLIENT_LIMIT:
+                    response = Response({"error": "Too many concurrent requests from this client. Please retry shortly."},
+                                        status=status.HTTP_429_TOO_MANY_REQUESTS)
+                else:
+                    response = Response({"error": "The server is busy. Please retry shortly."},
+                                        status=status.HTTP_503_SERVICE_UNAVAILABLE)
+                response['Retry-After'] = str(controller.retry_after)
+                return response
+            try:
+                return view_method(self, request, *args, **kwargs)
+            finally:
+                controller.release(client_id)
+        return wrapper
+    return decorator
@@ -0,0 +1,124 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# --- Token-Budgeted Corpus Builder for Gemini Prompts ---
+# Mentions are packed whole (never cut mid-corpus) in priority order until the token budget is used up.
+# Priority blends Reddit score and recency, and is discounted for sentiment labels that are already
+# well represented so the LLM sees the spread of opinion rather than only the loudest side.
+
+CHARS_PER_TOKEN = 4  # Rough average for English text with Gemini's tokenizer
+MAX_TOKENS_PER_MENTION = 600  # Very long self-posts are trimmed so one mention cannot eat the budget
+CORPUS_SEPARATOR = "\n---\n"
+SCORE_WEIGHT = 0.6
+RECENCY_WEIGHT = 0.4
+CORPUS_CACHE_MAX_ENTRIES = 128
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of LLM tokens in a piece of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def trim_to_token_limit(text: str, max_tokens: int) -> str:
+    """Trims text to roughly `max_tokens` tokens, cutting at a word boundary."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    trimmed = text[:max_chars - 3].rsplit(' ', 1)[0]
+    return trimmed + "..."
+
+
+class BoundedCache:
+    """A small thread-safe LRU cache shared by all requests in a worker process."""
+    def __init__(self, max_entries: int = CORPUS_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_corpus_cache = BoundedCache()
+
+
+def get_mention_set_hash(entries: list, token_budget: int, max_mentions: int) -> str:
+    """Returns a stable hash identifying a set of corpus entries and the packing limits."""
+    hasher = hashlib.sha256(f"{token_budget}:{max_mentions}".encode("utf-8"))
+    for entry in sorted(entries, key=lambda e: e['id']):
+        hasher.update(f"\x00{entry['id']}\x00{entry['score']}\x00{entry['text']}".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def get_corpus_hash(corpus: str) -> str:
+    """Returns a stable hash of a packed corpus, for caching results derived from it."""
+    return hashlib.sha256(corpus.encode("utf-8")).hexdigest()
+
+
+def _normalize(values: list) -> list:
+    low, high = min(values), max(values)
+    if high == low:
+        return [1.0 for _ in values]
+    return [(v - low) / (high - low) for v in values]
+
+
+def pack_corpus(entries: list, token_budget: int, max_mentions: int) -> str:
+    """
+    Greedily packs corpus entries by priority until `token_budget` or `max_mentions` is reached.
+    Each entry is a dict with 'id', 'text', 'score', 'created_utc' and 'sentiment_label'.
+    """
+    if not entries:
+        return ""
+
+    score_norm = _normalize([e['score'] for e in entries])
+    recency_norm = _normalize([e['created_utc'] for e in entries])
+    remaining = [
+        (SCORE_WEIGHT * s + RECENCY_WEIGHT * r, trim_to_token_limit(e['text'], MAX_TOKENS_PER_MENTION), e)
+        for s, r, e in zip(score_norm, recency_norm, entries)
+    ]
+
+    selected_texts = []
+    label_counts = {}
+    separator_tokens = estimate_tokens(CORPUS_SEPARATOR)
+    tokens_left = token_budget
+
+    while remaining and len(selected_texts) < max_mentions:
+        # Discount priority by how often the mention's sentiment label was already picked
+        best_index = max(
+            range(len(remaining)),
+            key=lambda i: remaining[i][0] / (1 + label_counts.get(remaining[i][2]['sentiment_label'], 0))
+        )
+        _, text, entry = remaining.pop(best_index)
+        cost = estimate_tokens(text) + (separator_tokens if selected_texts else 0)
+        if cost > tokens_left:
+            continue  # Skip it whole; a smaller mention further down may still fit
+        selected_texts.append(text)
+        tokens_left -= cost
+        label_counts[entry['sentiment_label']] = label_counts.get(entry['sentiment_label'], 0) + 1
+
+    return CORPUS_SEPARATOR.join(selected_texts)
+
+
+def build_summary_corpus(entries: list, token_budget: int, max_mentions: int) -> tuple:
+    """
+    Builds (or fetches from cache) the packed Gemini corpus for a set of mentions.
+    Returns a tuple of (corpus_text, mention_set_hash).
+    """
+    mention_set_hash = get_mention_set_hash(entries, token_budget, max_mentions)
+    corpus = _corpus_cache.get(mention_set_hash)
+    if corpus is None:
+        corpus = pack_corpus(entries, token_budget, max_mentions)
+        _corpus_cache.set(mention_set_hash, corpus)
+    return corpus, mention_set_hash
@@ -0,0 +1,88 @@
+import random
+import re
+import zlib
+
+# --- Near-Duplicate Detection (MinHash + LSH) ---
+# Copy-pasted comments, crossposts and bot replies show up many times in a single crawl.
+# Each mention gets a MinHash signature over its word shingles; an LSH index (built per crawl)
+# proposes candidate group leaders, which are confirmed by comparing signatures before a text joins a group.
+
+MINHASH_NUM_PERM = 64
+LSH_BANDS = 16  # 16 bands x 4 rows -> candidate pairs start appearing around ~0.5 similarity
+SHINGLE_SIZE = 3
+MAX_SIGNATURE_TEXT_CHARS = 5000  # Long self-posts only need their opening text to be fingerprinted
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_RE = re.compile(r"\w+")
+
+# Fixed seed so signatures are stable across requests and worker processes
+_rng = random.Random(1337)
+_PERMUTATIONS = [
+    (_rng.randint(1, _MERSENNE_PRIME - 1), _rng.randint(0, _MERSENNE_PRIME - 1))
+    for _ in range(MINHASH_NUM_PERM)
+]
+
+
+def get_shingles(text: str) -> set:
+    """Returns the set of word n-gram shingles (hashed to 32 bits) for a piece of text."""
+    tokens = _TOKEN_RE.findall(text[:MAX_SIGNATURE_TEXT_CHARS].lower())
+    if len(tokens) < SHINGLE_SIZE:
+        # Very short texts (e.g. "this!") become a single shingle of all their tokens
+        return {zlib.crc32(" ".join(tokens).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(tokens[i:i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+
+
+def compute_minhash_signature(text: str) -> tuple:
+    """Computes a MinHash signature (one minimum per permutation) for the given text."""
+    shingles = get_shingles(text)
+    return tuple(
+        min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimate_similarity(signature_a: tuple, signature_b: tuple) -> float:
+    """Estimates the Jaccard similarity of two texts from their MinHash signatures."""
+    matches = sum(1 for x, y in zip(signature_a, signature_b) if x == y)
+    return matches / len(signature_a)
+
+
+def group_near_duplicates(texts: list, threshold: float = 0.8) -> list:
+    """
+    Groups near-duplicate texts together.
+    Returns a list of groups, each a list of indices into `texts` (in ascending order).
+    Texts with no near-duplicates end up in a group of their own.
+    """
+    rows_per_band = MINHASH_NUM_PERM // LSH_BANDS
+    signatures = [compute_minhash_signature(text) for text in texts]
+
+    # Leader clustering: each text joins the most similar existing group leader (the group's first text)
+    # that meets the threshold, or else leads a new group. Comparing against the leader rather than any
+    # member prevents chains of pairwise-similar texts from merging texts that share nothing.
+    # LSH index: one bucket table per band, keyed by that band's slice of the signature; holds leaders only
+    buckets = [{} for _ in range(LSH_BANDS)]
+    groups = {}  # leader index -> member indices
+    for index, signature in enumerate(signatures):
+        band_keys = [signature[band * rows_per_band:(band + 1) * rows_per_band] for band in range(LSH_BANDS)]
+        candidate_leaders = set()
+        for band, band_key in enumerate(band_keys):
+            candidate_leaders.update(buckets[band].get(band_key, ()))
+
+        best_leader, best_similarity = None, threshold
+        for leader in sorted(candidate_leaders):
+            similarity = estimate_similarity(signature, signatures[leader])
+            if similarity >= best_similarity and (best_leader is None or similarity > best_similarity):
+                best_leader, best_similarity = leader, similarity
+
+        if best_leader is not None:
+            groups[best_leader].append(index)
+        else:
+            groups[index] = [index]
+            for band, band_key in enumerate(band_keys):
+                buckets[band].setdefault(band_key, []).append(index)
+
+    return list(groups.values())
@@ -1,3 +1,271 @@
-from django.test import TestCase
+import threading
+import time
 
-# Create your tests here.
+from django.test import RequestFactory, SimpleTestCase
+
+from .admission import (
+    ADMITTED, REJECTED_CLIENT_LIMIT, REJECTED_QUEUE_FULL, REJECTED_QUEUE_TIMEOUT,
+    AdmissionController, admission_controlled, get_client_id,
+)
+from .corpus import CORPUS_SEPARATOR, build_summary_corpus, estimate_tokens, get_corpus_hash, pack_corpus
+from .dedup import compute_minhash_signature, estimate_similarity, get_shingles, group_near_duplicates
+
+
+class NearDuplicateTests(SimpleTestCase):
+    def test_exact_and_near_copies_are_grouped(self):
+        texts = [
+            "I love the new Tesla model, great range and fast charging",
+            "Completely different text about Tesla stock prices today",
+            "I love the new Tesla model, great range and fast charging",
+            "i love the NEW Tesla model... great range and fast charging!!",
+        ]
+        self.assertEqual(group_near_duplicates(texts), [[0, 2, 3], [1]])
+
+    def test_distinct_short_comments_stay_separate(self):
+        self.assertEqual(group_near_duplicates(["X is good", "X is bad"]), [[0], [1]])
+
+    def test_texts_under_shingle_size_become_one_shingle(self):
+        self.assertEqual(len(get_shingles("Great!")), 1)
+        self.assertEqual(get_shingles("great"), get_shingles("GREAT!!"))
+        self.assertEqual(group_near_duplicates(["this!", "This", "that"]), [[0, 1], [2]])
+
+    def test_similarity_estimate(self):
+        signature = compute_minhash_signature("the quick brown fox jumps over the lazy dog")
+        self.assertEqual(estimate_similarity(signature, signature), 1.0)
+        other = compute_minhash_signature("an entirely unrelated sentence about cooking pasta at home")
+        self.assertLess(estimate_similarity(signature, other), 0.2)
+
+    def test_group_indices_are_stable_and_sorted(self):
+        texts = ["alpha beta gamma delta", "one two three four", "alpha beta gamma delta",
+                 "one two three four", "something else entirely here"]
+        groups = group_near_duplicates(texts)
+        self.assertEqual(groups, [[0, 2], [1, 3], [4]])
+        self.assertEqual(groups, group_near_duplicates(texts))
+        self.assertEqual(sorted(i for group in groups for i in group), list(range(len(texts))))
+
+    def test_chained_similar_texts_do_not_merge_unrelated_ones(self):
+        # Each text shifts two words from the previous one, so neighbours are similar but distant texts
+        # share no words at all and must never end up in the same group
+        words = [f"w{i}" for i in range(100)]
+        texts = [" ".join(words[2 * i:2 * i + 30]) for i in range(30)]
+        for group in group_near_duplicates(texts, threshold=0.8):
+            self.assertLess(max(group) - min(group), 15)
+            self.assertEqual(group, sorted(group))
+            leader_signature = compute_minhash_signature(texts[group[0]])
+            for index in group:
+                self.assertGreaterEqual(
+                    estimate_similarity(leader_signature, compute_minhash_signature(texts[index])), 0.8)
+
+    def test_empty_input(self):
+        self.assertEqual(group_near_duplicates([]), [])
+
+
+def make_corpus_entry(mention_id, text, score=0, created_utc=0, sentiment_label='neutral'):
+    return {'id': mention_id, 'text': text, 'score': score, 'created_utc': created_utc,
+            'sentiment_label': sentiment_label}
+
+
+class CorpusBuilderTests(SimpleTestCase):
+    def test_token_budget_is_honoured_with_whole_entries(self):
+        entries = [make_corpus_entry(str(i), f"mention {i} " + "word " * (10 * i), score=i) for i in range(1, 30)]
+        corpus = pack_corpus(entries, token_budget=300, max_mentions=25)
+        self.assertLessEqual(estimate_tokens(corpus), 300)
+        texts = {entry['text'] for entry in entries}
+        for part in corpus.split(CORPUS_SEPARATOR):
+            self.assertIn(part, texts)
+
+    def test_smaller_entries_fill_remaining_budget(self):
+        entries = [
+            make_corpus_entry("big", "x" * 400, score=100),
+            make_corpus_entry("huge", "y" * 4000, score=90),
+            make_corpus_entry("small", "z" * 40, score=0),
+        ]
+        self.assertEqual(pack_corpus(entries, token_budget=120, max_mentions=25),
+                         "x" * 400 + CORPUS_SEPARATOR + "z" * 40)
+
+    def test_returns_empty_corpus_when_nothing_fits(self):
+        entries = [make_corpus_entry("a", "a" * 100), make_corpus_entry("b", "b" * 200)]
+        self.assertEqual(pack_corpus(entries, token_budget=10, max_mentions=25), "")
+
+    def test_sentiment_diversity_discount(self):
+        entries = [
+            make_corpus_entry("top", "top positive", score=100, sentiment_label='positive'),
+            make_corpus_entry("second", "second positive", score=60, sentiment_label='positive'),
+            make_corpus_entry("negative", "lone negative", score=50, sentiment_label='negative'),
+        ]
+        corpus = pack_corpus(entries, token_budget=1000, max_mentions=2)
+        self.assertEqual(corpus.split(CORPUS_SEPARATOR), ["top positive", "lone negative"])
+
+    def test_corpus_is_cached_per_mention_set(self):
+        entries = [make_corpus_entry("a", "alpha", score=1), make_corpus_entry("b", "beta", score=2)]
+        corpus, mention_set_hash = build_summary_corpus(entries, token_budget=100, max_mentions=25)
+        self.assertEqual(build_summary_corpus(list(reversed(entries)), 100, 25), (corpus, mention_set_hash))
+        _, other_hash = build_summary_corpus(entries, token_budget=50, max_mentions=25)
+        self.assertNotEqual(mention_set_hash, other_hash)
+
+    def test_corpus_hash_ignores_changes_that_do_not_reach_the_corpus(self):
+        entries = [make_corpus_entry("a", "alpha", score=10), make_corpus_entry("b", "beta", score=5)]
+        # Score changes and an extra mention that does not fit leave the packed corpus (and its hash) unchanged
+        rescored = [make_corpus_entry("a", "alpha", score=12), make_corpus_entry("b", "beta", score=6),
+                    make_corpus_entry("c", "x" * 400, score=0)]
+        corpus, mention_set_hash = build_summary_corpus(entries, token_budget=10, max_mentions=25)
+        rescored_corpus, rescored_hash = build_summary_corpus(rescored, token_budget=10, max_mentions=25)
+        self.assertNotEqual(mention_set_hash, rescored_hash)
+        self.assertEqual(get_corpus_hash(corpus), get_corpus_hash(rescored_corpus))
+
+
+def make_controller(max_concurrent=1, max_queue=4, max_per_client=0, queue_timeout=5.0, trusted_proxy_count=0):
+    return AdmissionController("test", max_concurrent=max_concurrent, max_queue=max_queue,
+                               max_per_client=max_per_client, queue_timeout=queue_timeout, retry_after=7,
+                               trusted_proxy_count=trusted_proxy_count)
+
+
+class AdmissionControllerTests(SimpleTestCase):
+    def start_waiter(self, controller, client_id, admitted):
+        """Starts a thread that queues on the controller and records the client once admitted."""
+        def run():
+            if controller.acquire(client_id) == ADMITTED:
+                admitted.append(client_id)
+        thread = threading.Thread(target=run)
+        expected_waiting = controller.stats()["waiting"] + 1
+        thread.start()
+        self.wait_until(lambda: controller.stats()["waiting"] == expected_waiting)
+        return thread
+
+    def wait_until(self, predicate, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                self.fail("Timed out waiting for the admission controller")
+            time.sleep(0.005)
+
+    def test_fast_path_admits_up_to_max_concurrent(self):
+        controller = make_controller(max_concurrent=2)
+        self.assertEqual(controller.acquire("a"), ADMITTED)
+        self.assertEqual(controller.acquire("b"), ADMITTED)
+        self.assertEqual(controller.stats(), {"active": 2, "waiting": 0})
+        controller.release("a")
+        controller.release("b")
+        self.assertEqual(controller.stats(), {"active": 0, "waiting": 0})
+        self.assertFalse(controller._client_slots)
+
+    def test_rejects_when_queue_is_full(self):
+        controller = make_controller(max_concurrent=1, max_queue=1)
+        self.assertEqual(controller.acquire("a"), ADMITTED)
+        admitted = []
+        waiter = self.start_waiter(controller, "b", admitted)
+        self.assertEqual(controller.acquire("c"), REJECTED_QUEUE_FULL)
+        controller.release("a")
+        waiter.join()
+        self.assertEqual(admitted, ["b"])
+        controller.release("b")
+        self.assertEqual(controller.stats(), {"active": 0, "waiting": 0})
+
+    def test_per_client_cap_counts_running_and_queued_requests(self):
+        controller = make_controller(max_concurrent=1, max_per_client=2)
+        self.assertEqual(controller.acquire("a"), ADMITTED)
+        admitted = []
+        waiter = self.start_waiter(controller, "a", admitted)
+        self.assertEqual(controller.acquire("a"), REJECTED_CLIENT_LIMIT)
+        # Other clients can still queue while "a" is at its cap
+        other_waiter = self.start_waiter(controller, "b", admitted)
+        self.assertEqual(controller.stats(), {"active": 1, "waiting": 2})
+
+        controller.release("a")
+        self.wait_until(lambda: len(admitted) == 1)
+        controller.release(admitted[-1])
+        waiter.join()
+        other_waiter.join()
+        controller.release(admitted[-1])
+        self.assertEqual(sorted(admitted), ["a", "b"])
+        self.assertFalse(controller._client_slots)
+
+    def test_queue_timeout_withdraws_the_request(self):
+        controller = make_controller(max_concurrent=1, queue_timeout=0.05)
+        self.assertEqual(controller.acquire("a"), ADMITTED)
+        self.assertEqual(controller.acquire("b"), REJECTED_QUEUE_TIMEOUT)
+        self.assertEqual(controller._waiting_count, 0)
+        self.assertNotIn("b", controller._client_slots)
+        self.assertFalse(controller._waiting)
+        controller.release("a")
+        self.assertEqual(controller._waiting_count, 0)
+        self.assertFalse(controller._client_slots)
+
+    def test_queued_requests_are_admitted_round_robin(self):
+        controller = make_controller(max_concurrent=1, max_queue=5)
+        self.assertEqual(controller.acquire("holder"), ADMITTED)
+        admitted = []
+        threads = [self.start_waiter(controller, client_id, admitted) for client_id in ["a", "a", "a", "b", "b"]]
+
+        controller.release("holder")
+        for expected_count in range(1, 6):
+            self.wait_until(lambda: len(admitted) == expected_count)
+            controller.release(admitted[-1])
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(admitted, ["a", "b", "a", "b", "a"])
+        self.assertEqual(controller.stats(), {"active": 0, "waiting": 0})
+        self.assertFalse(controller._client_slots)
+
+    def test_admission_controlled_returns_503_with_retry_after(self):
+        controller = make_controller(max_concurrent=1, max_queue=0)
+        calls = []
+
+        class FakeView:
+            @admission_controlled(controller)
+            def handle(self, request):
+                calls.append(request)
+                return "ok"
+
+        request = RequestFactory().get("/api/reddit-mentions/", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(FakeView().handle(request), "ok")
+        self.assertEqual(controller.stats(), {"active": 0, "waiting": 0})
+
+        self.assertEqual(controller.acquire("10.0.0.2"), ADMITTED)
+        response = FakeView().handle(request)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "7")
+        self.assertEqual(len(calls), 1)
+        controller.release("10.0.0.2")
+
+    def test_admission_controlled_returns_429_when_client_is_over_its_cap(self):
+        controller = make_controller(max_concurrent=4, max_per_client=1)
+
+        class FakeView:
+            @admission_controlled(controller)
+            def handle(self, request):
+                return "ok"
+
+        request = RequestFactory().get("/api/reddit-mentions/", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(controller.acquire("10.0.0.1"), ADMITTED)
+        response = FakeView().handle(request)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "7")
+        # Another client is still admitted, since the server itself has capacity
+        other_request = RequestFactory().get("/api/reddit-mentions/", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(FakeView().handle(other_request), "ok")
+        controller.release("10.0.0.1")
+
+
+class ClientIdTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_ignores_forwarded_for_without_trusted_proxies(self):
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="1.2.3.4")
+        self.assertEqual(get_client_id(request), "10.0.0.1")
+
+    def test_uses_nth_entry_from_the_right_and_strips_port(self):
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.1",
+                                   HTTP_X_FORWARDED_FOR="6.6.6.6, 203.0.113.7:51234, 10.1.1.1")
+        self.assertEqual(get_client_id(request, trusted_proxy_count=1), "10.1.1.1")
+        self.assertEqual(get_client_id(request, trusted_proxy_count=2), "203.0.113.7")
+
+    def test_strips_port_from_bracketed_ipv6(self):
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="[2001:db8::1]:443")
+        self.assertEqual(get_client_id(request, trusted_proxy_count=1), "2001:db8::1")
+
+    def test_falls_back_to_remote_addr_when_too_few_hops(self):
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="1.2.3.4")
+        self.assertEqual(get_client_id(request, trusted_proxy_count=2), "10.0.0.1")
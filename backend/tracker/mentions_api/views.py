@@ -15,6 +15,10 @@ import nltk
 
 import google.generativeai as genai
 
+from .admission import AdmissionController, admission_controlled
+from .corpus import BoundedCache, build_summary_corpus, get_corpus_hash
+from .dedup import group_near_duplicates
+
 load_dotenv() 
 
 try:
@@ -75,8 +79,46 @@ NEGATIVE_THRESHOLD = -0.05
 
 # Max number of mentions to feed into Gemini for generating summary/themes
 GEMINI_MAX_INPUT_MENTIONS_FOR_SUMMARY = int(os.getenv('GEMINI_MAX_INPUT_MENTIONS_FOR_SUMMARY', 25)) # Reduced for performance
+# Estimated prompt token budget for the mentions corpus sent to Gemini for summary/themes
+GEMINI_SUMMARY_CORPUS_TOKEN_BUDGET = int(os.getenv('GEMINI_SUMMARY_CORPUS_TOKEN_BUDGET', 6000))
+# Generate summary and themes from a single structured (JSON) Gemini call instead of two calls
+GEMINI_COMBINED_SUMMARY_THEMES = os.getenv('GEMINI_COMBINED_SUMMARY_THEMES', 'true').lower() == 'true'
 # Max number of mentions to return in the API response list
 API_MENTIONS_LIST_LIMIT = int(os.getenv('API_MENTIONS_LIMIT', 50))
+# Near-duplicate mentions (crossposts, copy-pastes, bot replies) are collapsed into one group
+ENABLE_NEAR_DUPLICATE_COLLAPSING = os.getenv('ENABLE_NEAR_DUPLICATE_COLLAPSING', 'true').lower() == 'true'
+NEAR_DUPLICATE_SIMILARITY_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_SIMILARITY_THRESHOLD', 0.8))
+
+# --- Admission Control (per-endpoint concurrency limits) ---
+# Requests beyond the concurrency limit wait in a bounded queue; when it is full they get a 503 with Retry-After.
+# Limits are per worker process, so they only take effect under a threaded worker (e.g. gunicorn gthread).
+# Number of reverse proxies in front of the app that append to X-Forwarded-For (e.g. 1 on Azure App Service).
+# 0 identifies clients by REMOTE_ADDR only, since X-Forwarded-For is otherwise client-controlled.
+ADMISSION_TRUSTED_PROXY_COUNT = int(os.getenv('ADMISSION_TRUSTED_PROXY_COUNT', 0))
+# Running + queued requests per client (0 = no limit); over the limit a client gets a 429. Off by default without
+# trusted proxies, since behind an untrusted proxy every user shares the proxy's REMOTE_ADDR.
+ADMISSION_MAX_PER_CLIENT = int(os.getenv('ADMISSION_MAX_PER_CLIENT', 2 if ADMISSION_TRUSTED_PROXY_COUNT > 0 else 0))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 30))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', 5))
+
+mentions_admission = AdmissionController(
+    "reddit-mentions",
+    max_concurrent=int(os.getenv('MENTIONS_MAX_CONCURRENT', 4)),
+    max_queue=int(os.getenv('MENTIONS_MAX_QUEUE', 8)),
+    max_per_client=ADMISSION_MAX_PER_CLIENT,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    retry_after=ADMISSION_RETRY_AFTER,
+    trusted_proxy_count=ADMISSION_TRUSTED_PROXY_COUNT,
+)
+qna_admission = AdmissionController(
+    "reddit-qna",
+    max_concurrent=int(os.getenv('QNA_MAX_CONCURRENT', 8)),
+    max_queue=int(os.getenv('QNA_MAX_QUEUE', 16)),
+    max_per_client=ADMISSION_MAX_PER_CLIENT,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    retry_after=ADMISSION_RETRY_AFTER,
+    trusted_proxy_count=ADMISSION_TRUSTED_PROXY_COUNT,
+)
 
 def get_sentiment_label(score: float) -> str:
     """Categorizes a sentiment score into 'positive', 'negative', or 'neutral'."""
@@ -86,19 +128,37 @@ def get_sentiment_label(score: float) -> str:
         return 'negative'
     return 'neutral'
 
-def generate_with_gemini(model: genai.GenerativeModel, prompt_text: str, model_name_for_log: str = "Gemini") -> dict:
+# Summary/themes results keyed by (packed corpus hash, search term), i.e. the actual model input,
+# so repeated searches that would send Gemini the same prompt skip the LLM
+llm_analysis_cache = BoundedCache()
+
+# Structured output schema for the combined summary + themes Gemini call
+SUMMARY_THEMES_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "themes": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["summary", "themes"],
+}
+
+def generate_with_gemini(model: genai.GenerativeModel, prompt_text: str, model_name_for_log: str = "Gemini",
+                         response_mime_type: str = None, response_schema: dict = None) -> dict:
     """
     Helper function to generate content with a given Gemini model and handle common responses/errors.
+    Pass response_mime_type="application/json" (and optionally a response_schema) to request structured output.
     Returns a dictionary: {"text": "...", "error": "..."}
     """
     if not model:
         return {"text": None, "error": f"{model_name_for_log} model is not available or not configured."}
 
     # Standard generation configuration for Gemini
-    generation_config = genai.types.GenerationConfig(
-        max_output_tokens=1024,
-        temperature=0.3,      
-    )
+    generation_config_kwargs = {"max_output_tokens": 1024, "temperature": 0.3}
+    if response_mime_type:
+        generation_config_kwargs["response_mime_type"] = response_mime_type
+    if response_schema:
+        generation_config_kwargs["response_schema"] = response_schema
+    generation_config = genai.types.GenerationConfig(**generation_config_kwargs)
     # Standard safety settings to block harmful content
     safety_settings = [
         {"category": category, "threshold": "BLOCK_MEDIUM_AND_ABOVE"}
@@ -141,11 +201,109 @@ def generate_with_gemini(model: genai.GenerativeModel, prompt_text: str, model_n
         return {"text": None, "error": error_message}
 
 
+def parse_summary_and_themes(response_text: str) -> tuple:
+    """
+    Parses the combined summary + themes JSON returned by Gemini.
+    Returns a tuple: (summary_text, key_themes_list). Raises ValueError if the JSON does not match the schema.
+    """
+    parsed = json.loads(response_text)  # json.JSONDecodeError is a ValueError
+    if not isinstance(parsed, dict):
+        raise ValueError("expected a JSON object")
+    summary = parsed.get("summary")
+    themes = parsed.get("themes")
+    if not isinstance(summary, str) or not summary.strip():
+        raise ValueError("'summary' must be a non-empty string")
+    if not isinstance(themes, list) or not all(isinstance(theme, str) for theme in themes):
+        raise ValueError("'themes' must be a list of strings")
+    themes = [theme.strip() for theme in themes if theme.strip()]
+    if not themes:
+        raise ValueError("'themes' must not be empty")
+    # Keep the numbered "1. Theme: explanation." format the separate themes prompt produces
+    return summary.strip(), [f"{i}. {theme}" for i, theme in enumerate(themes, start=1)]
+
+
+def generate_summary_and_themes(search_term: str, corpus_for_gemini: str) -> tuple:
+    """
+    Generates the overall summary and key themes for a mentions corpus.
+    Uses a single structured (JSON) Gemini call when GEMINI_COMBINED_SUMMARY_THEMES is enabled,
+    falling back to separate summary and themes calls only if that call returns JSON that does not
+    match the schema. Other failures (safety blocks, quota/API errors) are returned as-is.
+    Returns a tuple: (summary_text, key_themes_list, error)
+    """
+    if GEMINI_COMBINED_SUMMARY_THEMES:
+        combined_prompt = f"""
+        Analyze the following Reddit mentions related to the search term "{search_term}".
+        Focus on an objective overview based *only* on the provided text.
+        Respond with a JSON object with exactly these keys:
+        "summary": a concise overall summary (2-4 sentences) covering the general sentiment,
+        key topics discussed, and any notable observations.
+        "themes": a list of the top 3-5 recurring themes or topics of discussion, each a string
+        of the form "Theme Name: Brief one-sentence explanation."
+
+        Mentions Corpus:
+        {corpus_for_gemini}
+        """
+        combined_result = generate_with_gemini(gemini_summary_model, combined_prompt, "Gemini Summary+Themes",
+                                               response_mime_type="application/json",
+                                               response_schema=SUMMARY_THEMES_RESPONSE_SCHEMA)
+        if not combined_result["text"]:
+            # Safety blocks and API/quota errors would fail the same way again, so don't retry
+            return None, None, combined_result["error"] or "No valid response from LLM."
+        try:
+            summary_text, key_themes_list = parse_summary_and_themes(combined_result["text"])
+            return summary_text, key_themes_list, None
+        except ValueError as e:
+            print(f"Gemini Summary+Themes returned invalid JSON ({e}). Falling back to separate calls.")
+
+    llm_summary_text = None
+    llm_key_themes_list = None
+    llm_analysis_error = None
+
+    # Prompt for overall summary
+    summary_prompt = f"""
+    Analyze the following Reddit mentions related to the search term "{search_term}".
+    Provide a concise overall summary (2-4 sentences) covering the general sentiment,
+    key topics discussed, and any notable observations.
+    Focus on an objective overview based *only* on the provided text.
+
+    Mentions Corpus:
+    {corpus_for_gemini}
+
+    Overall Summary:
+    """
+    summary_result = generate_with_gemini(gemini_summary_model, summary_prompt, "Gemini Summary")
+    llm_summary_text = summary_result["text"]
+    if summary_result["error"]:
+        llm_analysis_error = summary_result["error"]
+
+    # Prompt for key themes
+    themes_prompt = f"""
+    Based on the provided Reddit mentions regarding "{search_term}",
+    identify and list the top 3-5 recurring themes or topics of discussion.
+    For each theme, provide a very brief one-sentence explanation.
+    Present the themes as a numbered list (e.g., "1. Theme Name: Brief explanation.").
+
+    Mentions Corpus:
+    {corpus_for_gemini}
+
+    Key Themes:
+    """
+    themes_result = generate_with_gemini(gemini_summary_model, themes_prompt, "Gemini Themes")
+    if themes_result["text"]:
+        # Simple parsing for numbered list format
+        llm_key_themes_list = [theme.strip() for theme in themes_result["text"].split('\n') if theme.strip() and theme.strip()[0].isdigit()]
+    if themes_result["error"] and not llm_analysis_error:
+        llm_analysis_error = themes_result["error"]
+
+    return llm_summary_text, llm_key_themes_list, llm_analysis_error
+
+
 class RedditMentionsView(APIView):
     """
     API View to fetch Reddit mentions, calculate metrics, and generate LLM summaries/themes.
     """
     def get(self, request):
+        # Cheap validation runs before admission so invalid requests never take a slot
         search_term = request.query_params.get('term', None)
         if not search_term or not search_term.strip():
             return Response({"error": "Search term ('term') is required and cannot be empty."},
@@ -155,6 +313,10 @@ class RedditMentionsView(APIView):
             return Response({"error": "Sentiment analyzer (VADER) is not available. Please check server logs."},
                             status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
+        return self.fetch_mentions(request, search_term)
+
+    @admission_controlled(mentions_admission)
+    def fetch_mentions(self, request, search_term: str):
         try:
             # Initialize PRAW (Python Reddit API Wrapper)
             reddit = praw.Reddit(
@@ -173,7 +335,8 @@ class RedditMentionsView(APIView):
             sentiment_distribution = {"positive": 0, "neutral": 0, "negative": 0}
             author_counts = Counter()
             mention_type_counts = {"submission": 0, "comment": 0}
-            gemini_summary_input_texts = []
+            gemini_corpus_entries = [] # Candidate mentions for the token-budgeted Gemini corpus
+            candidate_mentions = [] # Matched mentions awaiting near-duplicate collapsing and scoring
 
             # Configurable limits from environment variables
             search_limit = int(os.getenv('REDDIT_SEARCH_LIMIT', 25)) 
@@ -212,10 +375,6 @@ class RedditMentionsView(APIView):
                     submission_full_text_for_sentiment += " " + submission.selftext
 
                 if submission_matched:
-                    vs = analyzer.polarity_scores(submission_full_text_for_sentiment)
-                    compound_sentiment = vs['compound']
-                    sentiment_label = get_sentiment_label(compound_sentiment)
-
                     mention_item = {
                         'id': submission.id,
                         'type': 'submission',
@@ -226,25 +385,14 @@ class RedditMentionsView(APIView):
                         'score': submission.score,
                         'created_utc': submission.created_utc,
                         'author': submission.author.name if submission.author else None,
-                        'sentiment_score': round(compound_sentiment, 3),
-                        'sentiment_label': sentiment_label
                     }
-                    all_mentions_data.append(mention_item)
-                    
-                    # Add text to corpus for Gemini summary, if limit not reached
-                    if len(gemini_summary_input_texts) < GEMINI_MAX_INPUT_MENTIONS_FOR_SUMMARY:
-                        gemini_summary_input_texts.append(f"Type: Submission\nTitle: {submission.title}\nBody: {submission.selftext or 'N/A'}\n")
-
-                    # Update aggregate metrics
-                    total_score_sum += submission.score
-                    valid_scores_count += 1
-                    subreddit_counts[submission.subreddit.display_name] += 1
-                    all_sentiment_scores_list.append(compound_sentiment)
-                    sentiment_distribution[sentiment_label] += 1
-                    mention_type_counts["submission"] += 1
-                    if submission.author and submission.author.name and submission.author.name != "[deleted]":
-                        author_counts[submission.author.name] += 1
-                    
+                    candidate_mentions.append({
+                        'item': mention_item,
+                        'sentiment_text': submission_full_text_for_sentiment,
+                        # Full title + body, so unrelated posts sharing a generic title are not merged
+                        'fingerprint_text': f"{submission.title} {submission.selftext or ''}",
+                        'summary_text': f"Type: Submission\nTitle: {submission.title}\nBody: {submission.selftext or 'N/A'}\n",
+                    })
                     processed_ids.add(submission.id)
 
                 # Process comments for this submission
@@ -255,10 +403,6 @@ class RedditMentionsView(APIView):
                         continue
 
                     if search_term.lower() in comment.body.lower():
-                        vs = analyzer.polarity_scores(comment.body)
-                        compound_sentiment = vs['compound']
-                        sentiment_label = get_sentiment_label(compound_sentiment)
-
                         mention_item = {
                             'id': comment_id_key, 
                             'type': 'comment',
@@ -269,25 +413,65 @@ class RedditMentionsView(APIView):
                             'score': comment.score,
                             'created_utc': comment.created_utc,
                             'author': comment.author.name if comment.author else None,
-                            'sentiment_score': round(compound_sentiment, 3),
-                            'sentiment_label': sentiment_label
                         }
-                        all_mentions_data.append(mention_item)
-
-                        if len(gemini_summary_input_texts) < GEMINI_MAX_INPUT_MENTIONS_FOR_SUMMARY:
-                             gemini_summary_input_texts.append(f"Type: Comment on '{submission.title[:50]}...'\nContent: {comment.body[:300]}\n")
-
-                        total_score_sum += comment.score
-                        valid_scores_count +=1
-                        subreddit_counts[submission.subreddit.display_name] += 1
-                        all_sentiment_scores_list.append(compound_sentiment)
-                        sentiment_distribution[sentiment_label] += 1
-                        mention_type_counts["comment"] += 1
-                        if comment.author and comment.author.name and comment.author.name != "[deleted]":
-                            author_counts[comment.author.name] += 1
-                        
+                        candidate_mentions.append({
+                            'item': mention_item,
+                            'sentiment_text': comment.body,
+                            'fingerprint_text': comment.body,
+                            'summary_text': f"Type: Comment on '{submission.title[:50]}...'\nContent: {comment.body[:300]}\n",
+                        })
                         processed_ids.add(comment_id_key)
-            
+
+            # --- Near-Duplicate Collapsing ---
+            # Crossposts, copy-pasted comments and bot replies are grouped so that each group is
+            # scored by VADER once and counted once; only the group representative is kept.
+            raw_mention_count = len(candidate_mentions)
+            if ENABLE_NEAR_DUPLICATE_COLLAPSING and candidate_mentions:
+                duplicate_groups = group_near_duplicates(
+                    [c['fingerprint_text'] for c in candidate_mentions],
+                    threshold=NEAR_DUPLICATE_SIMILARITY_THRESHOLD
+                )
+            else:
+                duplicate_groups = [[i] for i in range(len(candidate_mentions))]
+
+            for group in duplicate_groups:
+                # The highest-scoring mention represents its group (usually the original post)
+                members = [candidate_mentions[i] for i in group]
+                representative = max(members, key=lambda c: c['item']['score'])
+                mention_item = representative['item']
+
+                vs = analyzer.polarity_scores(representative['sentiment_text'])
+                compound_sentiment = vs['compound']
+                sentiment_label = get_sentiment_label(compound_sentiment)
+
+                mention_item['sentiment_score'] = round(compound_sentiment, 3)
+                mention_item['sentiment_label'] = sentiment_label
+                mention_item['duplicate_count'] = len(members) - 1
+                mention_item['duplicate_ids'] = [c['item']['id'] for c in members if c is not representative]
+                all_mentions_data.append(mention_item)
+
+                # Every representative is a corpus candidate; the corpus builder picks what fits the budget
+                gemini_corpus_entries.append({
+                    'id': mention_item['id'],
+                    'text': representative['summary_text'],
+                    'score': mention_item['score'],
+                    'created_utc': mention_item['created_utc'],
+                    'sentiment_label': sentiment_label,
+                })
+
+                # Update aggregate metrics
+                total_score_sum += mention_item['score']
+                valid_scores_count += 1
+                subreddit_counts[mention_item['subreddit']] += 1
+                all_sentiment_scores_list.append(compound_sentiment)
+                sentiment_distribution[sentiment_label] += 1
+                mention_type_counts[mention_item['type']] += 1
+                if mention_item['author'] and mention_item['author'] != "[deleted]":
+                    author_counts[mention_item['author']] += 1
+
+            if raw_mention_count != len(all_mentions_data):
+                print(f"Collapsed {raw_mention_count} mentions into {len(all_mentions_data)} distinct groups.")
+
             # --- Calculate Final Aggregations ---
             mention_count = len(all_mentions_data)
             average_score = total_score_sum / valid_scores_count if valid_scores_count > 0 else 0.0
@@ -308,49 +492,27 @@ class RedditMentionsView(APIView):
             llm_key_themes_list = None
             llm_analysis_error = None 
 
-            if ENABLE_GEMINI_ANALYSIS and gemini_summary_model and gemini_summary_input_texts:
-                corpus_for_gemini = "\n---\n".join(gemini_summary_input_texts)
-                MAX_CORPUS_CHARS_FOR_SUMMARY = 25000 
-                if len(corpus_for_gemini) > MAX_CORPUS_CHARS_FOR_SUMMARY:
-                    print(f"Warning: Corpus for Gemini summary is long ({len(corpus_for_gemini)} chars), truncating.")
-                    corpus_for_gemini = corpus_for_gemini[:MAX_CORPUS_CHARS_FOR_SUMMARY]
-                
-                # Prompt for overall summary
-                summary_prompt = f"""
-                Analyze the following Reddit mentions related to the search term "{search_term}".
-                Provide a concise overall summary (2-4 sentences) covering the general sentiment,
-                key topics discussed, and any notable observations.
-                Focus on an objective overview based *only* on the provided text.
-
-                Mentions Corpus:
-                {corpus_for_gemini}
-
-                Overall Summary:
-                """
-                summary_result = generate_with_gemini(gemini_summary_model, summary_prompt, "Gemini Summary")
-                llm_summary_text = summary_result["text"]
-                if summary_result["error"]:
-                    llm_analysis_error = summary_result["error"] 
-                
-                # Prompt for key themes
-                themes_prompt = f"""
-                Based on the provided Reddit mentions regarding "{search_term}",
-                identify and list the top 3-5 recurring themes or topics of discussion.
-                For each theme, provide a very brief one-sentence explanation.
-                Present the themes as a numbered list (e.g., "1. Theme Name: Brief explanation.").
-
-                Mentions Corpus:
-                {corpus_for_gemini}
-
-                Key Themes:
-                """
-                themes_result = generate_with_gemini(gemini_summary_model, themes_prompt, "Gemini Themes")
-                if themes_result["text"]:
-                    # Simple parsing for numbered list format
-                    llm_key_themes_list = [theme.strip() for theme in themes_result["text"].split('\n') if theme.strip() and theme.strip()[0].isdigit()]
-                if themes_result["error"] and not llm_analysis_error: 
-                    llm_analysis_error = themes_result["error"]
-            elif ENABLE_GEMINI_ANALYSIS and not gemini_summary_input_texts:
+            if ENABLE_GEMINI_ANALYSIS and gemini_summary_model and gemini_corpus_entries:
+                corpus_for_gemini, _ = build_summary_corpus(
+                    gemini_corpus_entries,
+                    token_budget=GEMINI_SUMMARY_CORPUS_TOKEN_BUDGET,
+                    max_mentions=GEMINI_MAX_INPUT_MENTIONS_FOR_SUMMARY
+                )
+                cache_key = (get_corpus_hash(corpus_for_gemini), search_term)
+                cached_analysis = llm_analysis_cache.get(cache_key)
+                if not corpus_for_gemini:
+                    print(f"No mentions fit the Gemini corpus token budget ({GEMINI_SUMMARY_CORPUS_TOKEN_BUDGET}) for '{search_term}'.")
+                elif cached_analysis:
+                    print(f"Using cached Gemini summary/themes for '{search_term}'.")
+                    llm_summary_text, llm_key_themes_list = cached_analysis
+                else:
+                    llm_summary_text, llm_key_themes_list, llm_analysis_error = generate_summary_and_themes(
+                        search_term, corpus_for_gemini
+                    )
+                    # Only complete results are cached, so empty or failed analyses are retried next time
+                    if llm_summary_text and isinstance(llm_key_themes_list, list) and llm_key_themes_list:
+                        llm_analysis_cache.set(cache_key, (llm_summary_text, llm_key_themes_list))
+            elif ENABLE_GEMINI_ANALYSIS and not gemini_corpus_entries:
                 print(f"No relevant mentions found to send to Gemini for summary/themes for '{search_term}'.")
 
 
@@ -358,6 +520,7 @@ class RedditMentionsView(APIView):
             response_data = {
                 "search_term": search_term,
                 "mention_count": mention_count, 
+                "raw_mention_count": raw_mention_count,
                 "average_score": round(average_score, 2),
                 "top_subreddits": subreddit_counts.most_common(5),
                 "average_sentiment": round(average_sentiment, 3),
@@ -391,26 +554,33 @@ class RedditQnAView(APIView):
     API View to handle Question & Answering based on provided mentions context.
     """
     def post(self, request):
+        # Cheap validation runs before admission so invalid requests never take a slot
         # Check if Q&A feature is enabled and the Q&A model is configured
         if not (ENABLE_GEMINI_ANALYSIS and gemini_qna_model):
             return Response({"error": "Q&A feature is disabled or the Q&A LLM model is not configured."},
                             status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-        try:
-            data = request.data 
-            question = data.get('question')
-            search_term = data.get('search_term')
-            # context_mentions are simplified mentions cached by the frontend in localStorage
-            context_mentions_raw = data.get('context_mentions')
-
-            if not all([question, search_term, context_mentions_raw]):
-                return Response({"error": "Missing required fields: 'question', 'search_term', and 'context_mentions'."},
-                                status=status.HTTP_400_BAD_REQUEST)
-            
-            if not isinstance(context_mentions_raw, list):
-                 return Response({"error": "'context_mentions' must be a list of mention objects."},
-                                 status=status.HTTP_400_BAD_REQUEST)
+        data = request.data 
+        if not isinstance(data, dict):
+            return Response({"error": "Invalid JSON payload in request body."}, status=status.HTTP_400_BAD_REQUEST)
+        question = data.get('question')
+        search_term = data.get('search_term')
+        # context_mentions are simplified mentions cached by the frontend in localStorage
+        context_mentions_raw = data.get('context_mentions')
+
+        if not all([question, search_term, context_mentions_raw]):
+            return Response({"error": "Missing required fields: 'question', 'search_term', and 'context_mentions'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        if not isinstance(context_mentions_raw, list):
+             return Response({"error": "'context_mentions' must be a list of mention objects."},
+                             status=status.HTTP_400_BAD_REQUEST)
 
+        return self.answer_question(request, question, search_term, context_mentions_raw)
+
+    @admission_controlled(qna_admission)
+    def answer_question(self, request, question: str, search_term: str, context_mentions_raw: list):
+        try:
             # Prepare the context text from the simplified mentions for the LLM prompt
             context_text_parts = []
             for i, m_data in enumerate(context_mentions_raw):
@@ -452,8 +622,6 @@ class RedditQnAView(APIView):
             
             return Response({"answer": qna_result["text"], "error": None}, status=status.HTTP_200_OK)
 
-        except json.JSONDecodeError:
-            return Response({"error": "Invalid JSON payload in request body."}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             error_msg = f"An unexpected server error occurred during Q&A: {str(e)}"
             print(error_msg)
@@ -11,6 +11,8 @@ export interface Mention {
   author: string | null;
   sentiment_score?: number;
   sentiment_label?: 'positive' | 'neutral' | 'negative';
+  duplicate_count?: number;
+  duplicate_ids?: string[];
 }
 
 export interface SimplifiedMentionForQA { 
@@ -23,6 +25,7 @@ export interface SimplifiedMentionForQA {
 export interface RedditMetrics {
   search_term: string;
   mention_count: number;
+  raw_mention_count?: number;
   average_score: number;
   top_subreddits: [string, number][];
   average_sentiment: number;